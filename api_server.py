@@ -2,23 +2,39 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
-import uvicorn
+import atexit
 import logging
 import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 from typing import Optional, List, Dict, Any
 import sys
 import os
-import traceback
 from pathlib import Path
 
+import orjson
+import uvicorn
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi.responses import ORJSONResponse, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, ConfigDict, Field
+
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# 项目目录常量，仅在导入时计算一次
+PROJECT_ROOT = Path(__file__).parent.resolve()
+DOWNLOADS_DIR = PROJECT_ROOT / "downloads"
+TEMP_DIR = PROJECT_ROOT / "temp"
+VOLUME_DIR = PROJECT_ROOT / "Volume"  # ROOT常量需要
+LOG_DIR = PROJECT_ROOT / "logs"
+
 # 直接导入必要的模块，避免循环依赖
 try:
     from source.module.manager import Manager
@@ -26,7 +42,7 @@ try:
     from source.translation import _
     from source.expansion import Cleaner, beautify_string
 except ImportError as e:
-    logging.error(f"导入模块失败: {e}")
+    logging.error("导入模块失败: %s", e)
     # 如果导入失败，创建简单的替代类
     class Manager:
         def __init__(self):
@@ -41,6 +57,14 @@ except ImportError as e:
     
     def beautify_string(text):
         return text
+
+# 预先导入下载模块，避免首个下载请求承担导入开销
+try:
+    from source.application import XHS
+except ImportError as e:
+    logging.error("无法导入XHS类: %s", e)
+    XHS = None
+
 from config.auth_middleware import APIAuthMiddleware, get_client_info
 
 # 尝试导入生产环境配置，如果没有则使用简单配置
@@ -61,85 +85,226 @@ except ImportError:
     env_config = get_simple_auth().get_environment_info()
     print("⚠️ 使用简单环境配置")
 
-# 设置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 设置日志：记录经队列交由后台线程写出，避免在事件循环中执行输出I/O
+# QueueHandler.prepare() 仍在调用线程中合并消息参数、渲染异常堆栈，后台线程只负责加时间与级别并写出
+log_queue = SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = QueueListener(log_queue, log_handler)
+# 直接挂载到根记录器：basicConfig 会给队列处理器补上默认格式，导致消息被格式化两次
+root_logger = logging.getLogger()
+root_logger.handlers[:] = [QueueHandler(log_queue)]
+root_logger.setLevel(logging.INFO)
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
-# 获取API根路径配置
-api_root_path = os.getenv("API_ROOT_PATH", "")
-if api_root_path and not api_root_path.startswith("/"):
-    api_root_path = "/" + api_root_path
+@dataclass(frozen=True, slots=True)
+class RuntimeConfig:
+    """运行时配置，导入时一次性读取，请求处理中只做属性访问"""
+    api_root_path: str
+    host: str
+    port: int
+    environment: str
+    auth_enabled: bool
+    debug: bool
+    rate_limit_enabled: bool
+    rate_limit_requests: int
+    rate_limit_window: int
+    api_key_header: str
+    max_concurrent_downloads: int
+    workers: int
+
+def load_runtime_config() -> RuntimeConfig:
+    """汇总环境变量及认证配置"""
+    # 获取API根路径配置
+    api_root_path = os.getenv("API_ROOT_PATH", "")
+    if api_root_path and not api_root_path.startswith("/"):
+        api_root_path = "/" + api_root_path
+    return RuntimeConfig(
+        api_root_path=api_root_path,
+        host=env_config.get("host", "0.0.0.0"),
+        port=env_config["port"],
+        environment=env_config["environment"],
+        auth_enabled=env_config["api_enabled"],
+        debug=env_config["debug"],
+        rate_limit_enabled=api_config.rate_limit_enabled,
+        rate_limit_requests=api_config.rate_limit_requests,
+        rate_limit_window=api_config.rate_limit_window,
+        api_key_header=os.getenv("API_KEY_HEADER", "X-API-Key"),
+        max_concurrent_downloads=int(os.getenv("MAX_CONCURRENT_DOWNLOADS", "8")),
+        workers=int(os.getenv("API_WORKERS", "1"))
+    )
+
+CFG = load_runtime_config()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时初始化，关闭时释放资源"""
+    await startup_event()
+    try:
+        yield
+    finally:
+        await shutdown_event()
 
 # 创建FastAPI应用
 app = FastAPI(
     title="XHS Downloader API",
     description="小红书下载器API服务 - 支持API Key认证",
     version="1.0.0",
-    docs_url=f"{api_root_path}/docs" if env_config["debug"] else None,
-    redoc_url=f"{api_root_path}/redoc" if env_config["debug"] else None,
-    root_path=api_root_path
+    docs_url=f"{CFG.api_root_path}/docs" if CFG.debug else None,
+    redoc_url=f"{CFG.api_root_path}/redoc" if CFG.debug else None,
+    openapi_url="/openapi.json" if CFG.debug else None,  # 生产环境不公开接口结构
+    root_path=CFG.api_root_path,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # 使用orjson序列化响应
 )
 
-# 添加CORS中间件 - 允许所有跨域访问
+# 添加GZip中间件 - 压缩超过1KB的响应
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# 添加CORS中间件 - 允许所有域名跨域访问
+# 通配域名不能与携带凭证同时使用，否则浏览器无法缓存预检结果
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # 允许所有域名
-    allow_credentials=True,  # 允许携带凭证
-    allow_methods=["*"],  # 允许所有HTTP方法
-    allow_headers=["*"],  # 允许所有请求头
+    allow_credentials=False,  # API Key 通过请求头传递，无需携带凭证
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=list(dict.fromkeys(["Authorization", "Content-Type", "X-API-Key", CFG.api_key_header])),
+    max_age=86400,  # 预检结果缓存一天
 )
 
+# 无需认证的路径：根路径、健康检查，调试模式下另含文档
+AUTH_EXEMPT_PATHS = frozenset(
+    f"{base}{path}"
+    for base in ("", CFG.api_root_path)
+    for path in ("/", "/health") + (("/docs", "/redoc", "/openapi.json") if CFG.debug else ())
+) | {CFG.api_root_path or "/"}
+
+class ConditionalAuth:
+    """按路径跳过认证的中间件
+
+    CORS 预检请求及 AUTH_EXEMPT_PATHS 中的路径直接转发，其余请求交由 APIAuthMiddleware 处理。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.auth = APIAuthMiddleware(app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and (scope["method"] == "OPTIONS" or scope["path"] in AUTH_EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+        else:
+            await self.auth(scope, receive, send)
+
 # 添加认证中间件（自动选择配置）
-app.add_middleware(APIAuthMiddleware)
+app.add_middleware(ConditionalAuth)
 
 # 全局变量
+# 默认下载选项（图片、视频、动图），与 DownloadRequest 的默认值保持一致
+DEFAULT_DOWNLOAD_FLAGS = (False, True, False)
+# 下载结果缓存的容量与有效期（秒）
+DOWNLOAD_CACHE_SIZE = 1024
+DOWNLOAD_CACHE_TTL = 300
+# 批量下载额度记录的客户端数量上限
+BATCH_USAGE_CLIENTS = 10000
+
+def create_xhs(cookie="", proxy=None, image_download=False, video_download=True, live_download=False):
+    """创建XHS实例
+
+    XHS.__new__ 实现为单例，直接调用 XHS(...) 会重新初始化共享实例，
+    因此这里绕过单例，保证按请求创建的实例不会覆盖 app.state.xhs。
+    """
+    xhs = object.__new__(XHS)
+    xhs.__init__(
+        work_path=str(DOWNLOADS_DIR),
+        folder_name="APIDownload",
+        name_format="API_作品标题",
+        user_agent=None,
+        cookie=cookie,
+        proxy=proxy,
+        timeout=30,
+        max_retry=3,
+        record_data=True,
+        image_format="PNG",
+        image_download=image_download,
+        video_download=video_download,
+        live_download=live_download,
+        folder_mode=True,
+        download_record=True,
+        author_archive=False,
+        write_mtime=False,
+        language="zh_CN"
+    )
+    return xhs
+
+def refresh_clock():
+    """刷新缓存的当前时间"""
+    app.state.now_iso = datetime.now().isoformat()
+    app.state.now_ts = time.time()
+
+async def clock_ticker():
+    """每秒刷新一次缓存时间，请求处理中直接读取，避免重复获取与格式化"""
+    while True:
+        refresh_clock()
+        await asyncio.sleep(1)
 
-@app.on_event("startup")
 async def startup_event():
     """应用启动时初始化"""
     try:
-        # 修复：使用容器内的正确路径
-        project_root = Path(__file__).parent
+        # 启动时间缓存任务
+        refresh_clock()
+        app.state.clock_task = asyncio.create_task(clock_ticker())
         
-        # 确保下载目录存在
-        downloads_dir = project_root / "downloads"
-        downloads_dir.mkdir(exist_ok=True)
-        logger.info(f"✅ 下载目录已创建/确认: {downloads_dir}")
+        # 下载结果缓存及进行中的任务
+        app.state.download_cache = TTLCache(maxsize=DOWNLOAD_CACHE_SIZE, ttl=DOWNLOAD_CACHE_TTL)
+        app.state.download_inflight = {}
         
-        # 创建临时目录
-        temp_dir = project_root / "temp"
-        temp_dir.mkdir(exist_ok=True)
-        logger.info(f"✅ 临时目录已创建/确认: {temp_dir}")
+        # 各客户端批量下载条目的时间戳，按频率限制窗口计费
+        app.state.batch_usage = TTLCache(maxsize=BATCH_USAGE_CLIENTS, ttl=CFG.rate_limit_window)
         
-        # 创建Volume目录（如果ROOT常量需要）
-        volume_dir = project_root / "Volume"
-        volume_dir.mkdir(exist_ok=True)
-        logger.info(f"✅ Volume目录已创建/确认: {volume_dir}")
+        # 限制同时进行的下载任务数量，避免占满事件循环
+        app.state.download_semaphore = asyncio.Semaphore(CFG.max_concurrent_downloads)
         
-        # 创建日志目录
-        log_dir = project_root / "logs"
-        log_dir.mkdir(exist_ok=True)
-        logger.info(f"✅ 日志目录已创建/确认: {log_dir}")
+        # 在线程中创建下载、临时、Volume及日志目录，避免阻塞事件循环
+        await asyncio.to_thread(
+            lambda: [p.mkdir(exist_ok=True) for p in (DOWNLOADS_DIR, TEMP_DIR, VOLUME_DIR, LOG_DIR)]
+        )
+        logger.info("✅ 目录已创建/确认: %s, %s, %s, %s", DOWNLOADS_DIR, TEMP_DIR, VOLUME_DIR, LOG_DIR)
         
-        # 目录初始化完成
+        # 创建共享XHS实例，复用连接池与数据库连接
+        app.state.xhs = None
+        if XHS:
+            xhs = create_xhs()
+            await xhs.__aenter__()
+            app.state.xhs = xhs
+            logger.info("✅ XHS共享实例已创建")
         
         # 记录启动信息
-        logger.info(f"✅ API服务器启动成功")
-        logger.info(f"🌍 环境: {env_config['environment']}")
-        logger.info(f"🔐 认证: {'启用' if env_config['api_enabled'] else '禁用'}")
-        logger.info(f"🚀 端口: {env_config['port']}")
-        logger.info(f"⚡ 频率限制: {'启用' if api_config.rate_limit_enabled else '禁用'}")
+        logger.info("✅ API服务器启动成功")
+        logger.info("🌍 环境: %s", CFG.environment)
+        logger.info("🔐 认证: %s", "启用" if CFG.auth_enabled else "禁用")
+        logger.info("🚀 端口: %s", CFG.port)
+        logger.info("⚡ 频率限制: %s", "启用" if CFG.rate_limit_enabled else "禁用")
         
     except Exception as e:
-        logger.error(f"❌ API服务器启动失败: {e}")
-        logger.error(f"错误堆栈: {traceback.format_exc()}")
+        logger.error("❌ API服务器启动失败: %s", e, exc_info=True)
+
+async def shutdown_event():
+    """应用关闭时释放资源"""
+    if clock_task := getattr(app.state, "clock_task", None):
+        clock_task.cancel()
+    if xhs := getattr(app.state, "xhs", None):
+        await xhs.__aexit__(None, None, None)
+        app.state.xhs = None
+        logger.info("✅ XHS共享实例已关闭")
 
 class DownloadRequest(BaseModel):
     """下载请求模型"""
-    url: str
+    # 忽略多余字段并限制字符串长度，尽早拒绝异常请求
+    model_config = ConfigDict(extra="ignore", str_max_length=8192, frozen=True)
+
+    url: str = Field(max_length=2048)  # 支持分享文本，因此不使用 HttpUrl
     save_path: Optional[str] = None
     quality: Optional[str] = "high"
     cookie: Optional[str] = ""  # 添加Cookie支持
@@ -154,30 +319,78 @@ class DownloadResponse(BaseModel):
     message: str
     data: Optional[Dict[str, Any]] = None
 
+class BatchDownloadRequest(BaseModel):
+    """批量下载请求模型"""
+    items: List[DownloadRequest] = Field(min_length=1, max_length=50)  # 单次最多50个链接
+
+class BatchDownloadResponse(BaseModel):
+    """批量下载响应模型"""
+    success: bool
+    message: str
+    results: List[DownloadResponse]
+
+# 固定响应内容，启动时预先序列化，避免每次请求重复构造与编码
+AUTH_STATUS = {
+    "environment": CFG.environment,
+    "auth_enabled": CFG.auth_enabled,
+    "rate_limit_enabled": CFG.rate_limit_enabled,
+    "port": CFG.port,
+    "debug": CFG.debug
+}
+AUTH_STATUS_BODY = orjson.dumps(AUTH_STATUS)
+ROOT_BODY = orjson.dumps({
+    "message": "XHS Downloader API 服务正在运行",
+    "environment": CFG.environment,
+    "auth_enabled": CFG.auth_enabled,
+    "version": "1.0.0"
+})
+INFO_BODY = orjson.dumps({
+    "service": "XHS Downloader API",
+    "version": "1.0.0",
+    "environment": AUTH_STATUS["environment"],
+    "python_version": sys.version,
+    "platform": sys.platform,
+    "auth_enabled": AUTH_STATUS["auth_enabled"],
+    "rate_limit_enabled": AUTH_STATUS["rate_limit_enabled"],
+    "port": AUTH_STATUS["port"],
+    "debug": AUTH_STATUS["debug"]
+})
+STATUS_BODY = orjson.dumps({
+    "status": "running",
+    "environment": CFG.environment,
+    "auth_enabled": CFG.auth_enabled,
+    "rate_limit": {
+        "enabled": CFG.rate_limit_enabled,
+        "max_requests": CFG.rate_limit_requests,
+        "window_seconds": CFG.rate_limit_window
+    },
+    "downloads": [],  # 当前下载队列
+    "service": "initialized"
+})
+# 健康检查仅时间戳变化，预先序列化其余字段并去掉结尾的 "}"
+HEALTH_BODY_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "service": "XHS Downloader API",
+    "environment": CFG.environment,
+    "auth_enabled": CFG.auth_enabled
+})[:-1] + b',"timestamp":'
+
 @app.get("/")
 async def root():
     """根路径"""
-    return {
-        "message": "XHS Downloader API 服务正在运行",
-        "environment": env_config["environment"],
-        "auth_enabled": env_config["api_enabled"],
-        "version": "1.0.0"
-    }
+    return Response(ROOT_BODY, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """健康检查"""
     try:
-        return {
-            "status": "healthy",
-            "service": "XHS Downloader API",
-            "environment": env_config["environment"],
-            "auth_enabled": env_config["api_enabled"],
-            "timestamp": time.time()
-        }
+        return Response(
+            HEALTH_BODY_PREFIX + str(app.state.now_ts).encode() + b"}",
+            media_type="application/json"
+        )
     except Exception as e:
-        logger.error(f"健康检查失败: {e}")
-        return JSONResponse(
+        logger.error("健康检查失败: %s", e)
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
@@ -190,118 +403,95 @@ async def health_check():
 @app.get("/info")
 async def get_info():
     """获取服务信息"""
-    try:
-        auth_status = get_auth_status()
-        return {
-            "service": "XHS Downloader API",
-            "version": "1.0.0",
-            "environment": auth_status["environment"],
-            "python_version": sys.version,
-            "platform": sys.platform,
-            "auth_enabled": auth_status["auth_enabled"],
-            "rate_limit_enabled": auth_status["rate_limit_enabled"],
-            "port": auth_status["port"],
-            "debug": auth_status["debug"]
-        }
-    except Exception as e:
-        logger.error(f"获取服务信息失败: {e}")
-        raise HTTPException(status_code=500, detail=f"无法获取服务信息: {str(e)}")
+    return Response(INFO_BODY, media_type="application/json")
 
 @app.get("/status")
 async def get_status():
     """获取当前服务运行状态"""
-    try:
-        return {
-            "status": "running",
-            "environment": env_config["environment"],
-            "auth_enabled": env_config["api_enabled"],
-            "rate_limit": {
-                "enabled": api_config.rate_limit_enabled,
-                "max_requests": api_config.rate_limit_requests,
-                "window_seconds": api_config.rate_limit_window
-            },
-            "downloads": [],  # 当前下载队列
-            "service": "initialized"
-        }
-    except Exception as e:
-        logger.error(f"获取服务状态失败: {e}")
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "error",
-                "message": f"服务异常: {str(e)}",
-                "error_code": "SERVICE_ERROR",
-                "timestamp": asyncio.get_event_loop().time()
-            }
-        )
+    return Response(STATUS_BODY, media_type="application/json")
 
 @app.get("/auth/status")
 async def get_auth_status_endpoint():
     """获取认证状态信息"""
-    try:
-        return get_auth_status()
-    except Exception as e:
-        logger.error(f"获取认证状态失败: {e}")
-        raise HTTPException(status_code=500, detail=f"无法获取认证状态: {str(e)}")
+    return Response(AUTH_STATUS_BODY, media_type="application/json")
 
-@app.post("/download", response_model=DownloadResponse)
-async def download_content(request: DownloadRequest, client_info: Dict = Depends(get_client_info)):
-    """下载小红书内容"""
-    try:
-        # 记录下载请求
-        logger.info(f"下载请求: {request.url} - 客户端: {client_info['client_id']}")
-        
-        # 导入XHS类
-        try:
-            from source.application import XHS
-        except ImportError as e:
-            logger.error(f"无法导入XHS类: {e}")
-            return DownloadResponse(
-                success=False,
-                message="系统错误：无法加载下载模块",
-                data=None
+async def extract_content(request: DownloadRequest) -> list:
+    """执行提取与下载，返回作品数据列表"""
+    # 无自定义Cookie、代理且下载选项为默认值时，复用共享实例
+    xhs = getattr(app.state, "xhs", None)
+    flags = (request.image_download, request.video_download, request.live_download)
+    async with app.state.download_semaphore:
+        if xhs and not request.cookie and not request.proxy and flags == DEFAULT_DOWNLOAD_FLAGS:
+            return await xhs.extract(
+                request.url,
+                download=True,
+                index=None
             )
-        
-        # 创建XHS实例
-        project_root = Path(__file__).parent
-        xhs = XHS(
-            work_path=str(project_root / "downloads"),
-            folder_name="APIDownload",
-            name_format="API_作品标题",
-            user_agent=None,
-            cookie=request.cookie if request.cookie else None,
+        # 按请求参数创建独立实例
+        xhs = create_xhs(
+            cookie=request.cookie or "",  # Manager 将其写入请求头，不能为 None
             proxy=request.proxy if request.proxy else None,
-            timeout=30,
-            max_retry=3,
-            record_data=True,
-            image_format="PNG",
             image_download=request.image_download,  # 使用请求参数，默认false
             video_download=request.video_download,  # 使用请求参数，默认true
-            live_download=request.live_download,    # 使用请求参数，默认false
-            folder_mode=True,
-            download_record=True,
-            author_archive=False,
-            write_mtime=False,
-            language="zh_CN"
+            live_download=request.live_download     # 使用请求参数，默认false
         )
-        
-        # 执行下载
         async with xhs:
-            result = await xhs.extract(
+            return await xhs.extract(
                 request.url,
                 download=True,
                 index=None
             )
+
+async def cached_extract(request: DownloadRequest) -> list:
+    """带缓存的提取，相同请求在有效期内直接返回缓存结果，并发的相同请求合并为一次提取"""
+    # Cookie 与代理可能影响获取到的内容，一并作为缓存键
+    key = (
+        request.url,
+        request.image_download,
+        request.video_download,
+        request.live_download,
+        request.cookie,
+        request.proxy
+    )
+    if (result := app.state.download_cache.get(key)) is not None:
+        return result
+    inflight = app.state.download_inflight
+    if (task := inflight.get(key)) is None:
+        task = inflight[key] = asyncio.create_task(extract_content(request))
+
+        def done(t: asyncio.Task):
+            inflight.pop(key, None)
+            # 提取失败的作品返回空字典，仅缓存全部成功的结果
+            if not t.cancelled() and not t.exception() and (result := t.result()) and all(result):
+                app.state.download_cache[key] = result
+
+        task.add_done_callback(done)
+    # 使用 shield，单个客户端断开时不影响其他等待同一任务的请求
+    return await asyncio.shield(task)
+
+async def download_one(request: DownloadRequest) -> DownloadResponse:
+    """处理单个下载请求"""
+    try:
+        # 下载模块导入失败时直接返回错误
+        if XHS is None:
+            return DownloadResponse(
+                success=False,
+                message="系统错误：无法加载下载模块",
+                data=None
+            )
+        
+        # 执行下载，相同请求复用缓存或进行中的任务
+        result = await cached_extract(request)
         
-        # 处理结果
-        if result:
+        # 处理结果，任一作品提取失败（空字典）即视为失败，与缓存规则一致
+        if result and all(result):
             download_info = {
                 "url": request.url,
                 "status": "completed",
                 "message": "下载完成",
                 "result_count": len(result),
                 "results": result,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": app.state.now_iso
             }
             
             return DownloadResponse(
@@ -319,14 +509,62 @@ async def download_content(request: DownloadRequest, client_info: Dict = Depends
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"下载请求处理失败: {e}")
-        logger.error(f"错误堆栈: {traceback.format_exc()}")
+        logger.error("下载请求处理失败: %s", e, exc_info=True)
         return DownloadResponse(
             success=False,
             message=f"下载失败: {str(e)}",
             data=None
         )
 
+@app.post("/download", response_model=DownloadResponse)
+async def download_content(request: DownloadRequest, client_info: Dict = Depends(get_client_info)):
+    """下载小红书内容"""
+    # 记录下载请求
+    logger.info("下载请求: %s - 客户端: %s", request.url, client_info["client_id"])
+    return await download_one(request)
+
+def charge_batch_items(client_id: str, count: int):
+    """按条目数扣除批量下载额度
+
+    APIAuthMiddleware 对每个请求只计一次，批量请求中的每个链接在此额外计费，
+    额度与频率限制相同，超出时返回429
+    """
+    now = time.time()
+    usage = app.state.batch_usage.get(client_id) or deque()
+    while usage and usage[0] <= now - CFG.rate_limit_window:
+        usage.popleft()
+    if len(usage) + count > CFG.rate_limit_requests:
+        raise HTTPException(
+            status_code=429,
+            detail=f"批量下载额度不足: 窗口内剩余 {CFG.rate_limit_requests - len(usage)} 个链接"
+        )
+    usage.extend([now] * count)
+    # 重新写入以刷新过期时间，窗口内无请求的客户端自动清除
+    app.state.batch_usage[client_id] = usage
+
+@app.post("/download/batch", response_model=BatchDownloadResponse)
+async def download_batch(request: BatchDownloadRequest, client_info: Dict = Depends(get_client_info)):
+    """批量下载小红书内容"""
+    logger.info("批量下载请求: %s 个链接 - 客户端: %s", len(request.items), client_info["client_id"])
+    if CFG.rate_limit_enabled:
+        charge_batch_items(client_info["client_id"], len(request.items))
+    # 并发执行，实际并发数由下载信号量限制
+    results = await asyncio.gather(
+        *[download_one(item) for item in request.items],
+        return_exceptions=True
+    )
+    results = [
+        DownloadResponse(success=False, message=f"下载失败: {str(r)}", data=None)
+        if isinstance(r, Exception) else r
+        for r in results
+    ]
+    succeeded = sum(r.success for r in results)
+    return BatchDownloadResponse(
+        success=succeeded == len(results),
+        message=f"批量下载完成: 成功 {succeeded} 个，失败 {len(results) - succeeded} 个",
+        results=results
+    )
+
 @app.get("/client/info")
 async def get_client_info_endpoint(client_info: Dict = Depends(get_client_info)):
     """获取当前客户端信息"""
@@ -334,18 +572,29 @@ async def get_client_info_endpoint(client_info: Dict = Depends(get_client_info))
 
 if __name__ == "__main__":
     print(f"🚀 启动XHS-Downloader API服务器...")
-    print(f"🌍 环境: {env_config['environment']}")
-    print(f"🔐 认证: {'启用' if env_config['api_enabled'] else '禁用'}")
-    print(f"🚀 端口: {env_config['port']}")
-    print(f"📚 API文档: http://{env_config.get('host', '127.0.0.1')}:{env_config['port']}/docs")
+    print(f"🌍 环境: {CFG.environment}")
+    print(f"🔐 认证: {'启用' if CFG.auth_enabled else '禁用'}")
+    print(f"🚀 端口: {CFG.port}")
+    print(f"📚 API文档: http://{CFG.host}:{CFG.port}/docs")
     print(f"🔧 按 Ctrl+C 停止服务器")
     
     try:
+        # 以导入字符串启动，多进程模式下各 worker 可独立加载应用
         uvicorn.run(
-            app,
-            host=env_config.get("host", "0.0.0.0"),
-            port=env_config["port"],
-            log_level="info"
+            "api_server:app",
+            host=CFG.host,
+            port=CFG.port,
+            loop="auto",  # 已安装 uvloop 时自动启用，Windows 下回退到 asyncio
+            http="auto",  # 已安装 httptools 时自动启用
+            # 默认单进程：XHS实例、结果缓存、进行中任务合并、并发与批量额度均为进程内状态，
+            # 多进程会各自持有一份且同时写入 ExploreID.db；仅在确认可接受时通过 API_WORKERS 调大
+            workers=CFG.workers,
+            log_level="warning",
+            access_log=False,
+            backlog=4096,  # 突发流量时可排队的连接数
+            timeout_keep_alive=30,  # 延长长连接保持时间，减少重复握手
+            limit_concurrency=256,
+            ws="none"  # 无 WebSocket 接口
         )
     except KeyboardInterrupt:
         print("\n👋 服务器已停止")
@@ -29,8 +29,10 @@ class IDRecorder:
 
     async def select(self, id_: str):
         if self.switch:
-            await self.cursor.execute("SELECT ID FROM explore_id WHERE ID=?", (id_,))
-            return await self.cursor.fetchone()
+            async with self.database.execute(
+                "SELECT ID FROM explore_id WHERE ID=?", (id_,)
+            ) as cursor:
+                return await cursor.fetchone()
 
     async def add(
         self,
@@ -163,10 +165,10 @@ class MapRecorder(IDRecorder):
 
     async def select(self, id_: str):
         if self.switch:
-            await self.cursor.execute(
+            async with self.database.execute(
                 "SELECT NAME FROM mapping_data WHERE ID=?", (id_,)
-            )
-            return await self.cursor.fetchone()
+            ) as cursor:
+                return await cursor.fetchone()
 
     async def add(self, id_: str, name: str, *args, **kwargs) -> None:
         if self.switch: